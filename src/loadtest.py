@@ -0,0 +1,564 @@
+"""Load test for the Movey Money dashboard.
+
+Replays scripted dashboard sessions (slider scrubbing, genre toggles,
+drill-down changes) against the Dash callback route `/_dash-update-component`
+and reports throughput, per-callback latency percentiles and worker memory.
+
+Like the Dash renderer, every callback triggered by one control change is sent
+in parallel, so `--users N` keeps up to 3N requests in flight.
+
+Run from the repository root so that the data paths in `data.py` resolve:
+
+    # in-process, through the Flask test client of `src.app:server`
+    python src/loadtest.py --users 8 --sessions 5
+
+    # against a local gunicorn, sampling the memory of its worker processes
+    gunicorn src.app:server --pythonpath=src --workers 4 --bind 127.0.0.1:8050 \
+        --pid gunicorn.pid
+    python src/loadtest.py --url http://127.0.0.1:8050 --master-pid $(cat gunicorn.pid)
+
+Memory is read from /proc, so it is only sampled on Linux.
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPException
+from urllib import request as urlrequest
+from urllib.error import HTTPError
+
+import numpy as np
+
+
+## callback name -> (outputs, inputs) of the callbacks driven by the controls;
+## check_callbacks makes sure this is exactly the set of callbacks the server
+## runs on these controls before every run
+CALLBACKS = {
+    "plot_linechart": ([("linechart", "srcDoc")], ["genres", "years"]),
+    "plot_heatmap": ([("heatmap", "srcDoc")], ["genres", "years"]),
+    "update_genres": (
+        [("genres_drill", "options"), ("genres_drill", "value")],
+        ["genres"],
+    ),
+    "generate_dash_table": (
+        [("actor_col", "children")],
+        ["genres_drill", "years", "budget"],
+    ),
+}
+
+## callbacks fired by the browser when a control value changes
+TRIGGERS = {
+    control: [name for name, (_, inputs) in CALLBACKS.items() if control in inputs]
+    for control in ["genres", "years", "budget", "genres_drill"]
+}
+
+## callbacks fired on page load; the others wait for an input that is itself
+## a callback output
+INITIAL = [
+    name
+    for name, (_, inputs) in CALLBACKS.items()
+    if not any(
+        (id, "value") in outputs for id in inputs for outputs, _ in CALLBACKS.values()
+    )
+]
+
+ENDPOINT = "/_dash-update-component"
+
+
+def output_id(outputs):
+    if len(outputs) == 1:
+        return "{}.{}".format(*outputs[0])
+    return "..{}..".format("...".join("{}.{}".format(id, prop) for id, prop in outputs))
+
+
+def build_payload(name, state, changed):
+    outputs, inputs = CALLBACKS[name]
+    output_specs = [{"id": id, "property": prop} for id, prop in outputs]
+    return {
+        "output": output_id(outputs),
+        "outputs": output_specs[0] if len(outputs) == 1 else output_specs,
+        "inputs": [
+            {"id": id, "property": "value", "value": state[id]} for id in inputs
+        ],
+        "changedPropIds": [f"{id}.value" for id in changed if id in inputs],
+        "state": [],
+    }
+
+
+def check_callbacks(dependencies):
+    # fail early instead of sending payloads the server would reject, or
+    # silently skipping callbacks the app added on the driven controls
+    served = {
+        dependency["output"]: dependency
+        for dependency in dependencies
+        if any(input["id"] in TRIGGERS for input in dependency["inputs"])
+    }
+    driven = {output_id(outputs): name for name, (outputs, _) in CALLBACKS.items()}
+    for output in served:
+        if output not in driven:
+            sys.exit(
+                f"loadtest: the app's callback for {output} uses a driven "
+                f"control but is missing from CALLBACKS"
+            )
+    for output, name in driven.items():
+        dependency = served.get(output)
+        if dependency is None:
+            sys.exit(f"loadtest: {name} ({output}) is not served by the app")
+        inputs = [(input["id"], input["property"]) for input in dependency["inputs"]]
+        expected = [(id, "value") for id in CALLBACKS[name][1]]
+        if inputs != expected:
+            sys.exit(
+                f"loadtest: {name} does not match the app's callbacks "
+                f"(expected inputs {expected}, server has {inputs})"
+            )
+        if dependency.get("state"):
+            sys.exit(f"loadtest: {name} takes State arguments, which are not sent")
+
+
+def read_controls(layout):
+    # slider ranges, genre options and initial values as served by the app
+    found = {}
+
+    def walk(node):
+        if isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif isinstance(node, dict):
+            props = node.get("props", {})
+            if props.get("id") in TRIGGERS:
+                found[props["id"]] = props
+            for value in props.values():
+                walk(value)
+
+    walk(layout)
+    missing = [id for id in TRIGGERS if id not in found]
+    if missing:
+        sys.exit(f"loadtest: controls {missing} not found in the app layout")
+
+    controls = {
+        "genres": [option["value"] for option in found["genres"]["options"]],
+        "years": (found["years"]["min"], found["years"]["max"]),
+        "budget": (
+            found["budget"]["min"],
+            found["budget"]["max"],
+            found["budget"].get("step", 1),
+        ),
+    }
+    state = {id: props.get("value") for id, props in found.items()}
+    return controls, state
+
+
+## Sessions
+# Each session script takes a random generator, the current control state and
+# the control ranges, and returns the list of (control, value) changes a user
+# would make. Values equal to the previous one are dropped, since the browser
+# does not fire callbacks for them.
+def drop_repeats(control, values, state):
+    actions = []
+    current = state[control]
+    for value in values:
+        if value != current:
+            actions.append((control, value))
+            current = value
+    return actions
+
+
+def scrub_years(rng, state, controls):
+    # drag the lower handle, then the upper handle, one mouse move per step
+    low, high = controls["years"]
+    start, end = state["years"]
+    new_start = rng.randint(low, min(end, high) - 1)
+    new_end = rng.randint(new_start + 1, high)
+    values = [
+        [int(year), end]
+        for year in np.linspace(start, new_start, num=rng.randint(3, 8))[1:]
+    ]
+    values += [
+        [new_start, int(year)]
+        for year in np.linspace(end, new_end, num=rng.randint(3, 8))[1:]
+    ]
+    return drop_repeats("years", values, state)
+
+
+def scrub_budget(rng, state, controls):
+    # drag one of the two handles along the slider steps
+    low, high, step = controls["budget"]
+    budget = list(state["budget"])
+    handle = rng.randrange(2)
+    target = rng.randrange(int(low), int(high) + 1, int(step))
+    values = []
+    for value in np.linspace(budget[handle], target, num=rng.randint(3, 8))[1:]:
+        budget[handle] = int(value)
+        values.append(sorted(budget))
+    return drop_repeats("budget", values, state)
+
+
+def toggle_genres(rng, state, controls):
+    genres = list(state["genres"])
+    values = []
+    for _ in range(rng.randint(2, 5)):
+        # never empty the dropdown, update_genres needs at least one genre
+        if len(genres) > 1 and rng.random() < 0.5:
+            genres.remove(rng.choice(genres))
+        else:
+            unused = [genre for genre in controls["genres"] if genre not in genres]
+            if unused:
+                genres.append(rng.choice(unused))
+        values.append(list(genres))
+    return drop_repeats("genres", values, state)
+
+
+def drill_down(rng, state, controls):
+    genres = [genre for genre in state["genres"] if genre != state["genres_drill"]]
+    rng.shuffle(genres)
+    return drop_repeats("genres_drill", genres[: rng.randint(1, 4)], state)
+
+
+def mixed(rng, state, controls):
+    script = rng.choice([scrub_years, scrub_budget, toggle_genres, drill_down])
+    return script(rng, state, controls)
+
+
+SESSIONS = {
+    "scrub_years": scrub_years,
+    "scrub_budget": scrub_budget,
+    "toggle_genres": toggle_genres,
+    "drill_down": drill_down,
+    "mixed": mixed,
+}
+
+
+## Transports
+# Each transport returns a `get(path)` returning the decoded JSON body and a
+# `post(payload)` returning the status code and the decoded JSON body.
+def make_test_client():
+    # imported lazily so that --url runs do not load the data set
+    from app import server
+
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, "client"):
+            local.client = server.test_client()
+        return local.client
+
+    def get(path):
+        return client().get(path).get_json()
+
+    def post(payload):
+        response = client().post(ENDPOINT, json=payload)
+        return response.status_code, response.get_json(silent=True)
+
+    return get, post
+
+
+def make_http_client(url, timeout):
+    url = url.rstrip("/")
+
+    def get(path):
+        try:
+            with urlrequest.urlopen(url + path, timeout=timeout) as response:
+                return json.loads(response.read())
+        except (OSError, HTTPException, ValueError) as error:
+            sys.exit(f"loadtest: cannot reach {url}{path} ({error})")
+
+    def post(payload):
+        req = urlrequest.Request(
+            url + ENDPOINT,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urlrequest.urlopen(req, timeout=timeout) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as error:
+            return error.code, None
+        except (OSError, HTTPException, ValueError):
+            # dropped connections (e.g. a worker killed by gunicorn's
+            # timeout) and timeouts count as errors instead of ending the run
+            return None, None
+
+    return get, post
+
+
+## Memory
+def read_rss(pid):
+    # resident set size in MB, or None if the process cannot be inspected
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def list_children(pid):
+    # current child processes, e.g. the workers of a gunicorn master
+    children = []
+    for path in glob.glob(f"/proc/{pid}/task/*/children"):
+        try:
+            with open(path) as f:
+                children += [int(child) for child in f.read().split()]
+        except OSError:
+            continue
+    return children
+
+
+def sample_memory(list_pids, interval, stop, samples, started):
+    # list_pids is called on every sample so respawned workers are picked up
+    while not stop.is_set():
+        elapsed = time.perf_counter() - started
+        for pid in list_pids():
+            samples.append((elapsed, pid, read_rss(pid)))
+        stop.wait(interval)
+
+
+## Runner
+def run_user(user, args, post, controls, initial_state, results):
+    rng = random.Random(args.seed + user)
+    script = SESSIONS[args.session]
+    group_size = max(len(names) for names in TRIGGERS.values())
+
+    def send(name, payload):
+        start = time.perf_counter()
+        status, body = post(payload)
+        results.append((name, start, time.perf_counter() - start, status))
+        return body if status == 200 else None
+
+    def fire(names, state, changed, executor):
+        # send the whole group at once and wait for it, like the renderer
+        payloads = [(name, build_payload(name, state, changed)) for name in names]
+        bodies = list(executor.map(lambda item: send(*item), payloads))
+
+        # controls updated by a callback fire their own dependents
+        updated = []
+        for body in bodies:
+            if not body:
+                continue
+            for id, props in body.get("response", {}).items():
+                if id in TRIGGERS and "value" in props:
+                    state[id] = props["value"]
+                    updated.append(id)
+        chained = [
+            name
+            for id in updated
+            for name in TRIGGERS[id]
+            if name not in names
+        ]
+        if chained:
+            fire(list(dict.fromkeys(chained)), state, updated, executor)
+
+    with ThreadPoolExecutor(max_workers=group_size) as executor:
+        for _ in range(args.sessions):
+            state = json.loads(json.dumps(initial_state))
+            fire(INITIAL, state, [], executor)
+            for _ in range(args.steps):
+                for control, value in script(rng, state, controls):
+                    state[control] = value
+                    fire(TRIGGERS[control], state, [control], executor)
+                    if args.think_time:
+                        time.sleep(rng.uniform(0, args.think_time))
+
+
+def summarize(results, samples, duration):
+    report = {"duration": duration, "requests": len(results), "callbacks": {}}
+    report["throughput"] = len(results) / duration if duration else 0.0
+    for name in CALLBACKS:
+        latencies = [r[2] for r in results if r[0] == name]
+        if not latencies:
+            continue
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+        report["callbacks"][name] = {
+            "count": len(latencies),
+            "errors": sum(1 for r in results if r[0] == name and r[3] != 200),
+            "mean_ms": float(np.mean(latencies)) * 1000,
+            "p50_ms": float(p50),
+            "p90_ms": float(p90),
+            "p99_ms": float(p99),
+            "max_ms": float(np.max(latencies)) * 1000,
+        }
+    report["memory"] = [
+        {"elapsed": elapsed, "pid": pid, "rss_mb": rss}
+        for elapsed, pid, rss in samples
+    ]
+    # start, peak and end RSS of every sampled process
+    report["workers"] = {}
+    for pid in dict.fromkeys(pid for _, pid, _ in samples):
+        series = [(t, rss) for t, p, rss in samples if p == pid and rss is not None]
+        if not series:
+            continue
+        report["workers"][pid] = {
+            "first_seen": series[0][0],
+            "last_seen": series[-1][0],
+            "start_mb": series[0][1],
+            "peak_mb": max(rss for _, rss in series),
+            "end_mb": series[-1][1],
+        }
+    return report
+
+
+def print_report(report):
+    print(
+        f"{report['requests']} requests in {report['duration']:.1f}s "
+        f"({report['throughput']:.1f} req/s)"
+    )
+    print()
+    header = f"{'callback':<22}{'count':>7}{'errors':>8}"
+    header += "".join(f"{col:>10}" for col in ["mean", "p50", "p90", "p99", "max"])
+    print(header + "   (ms)")
+    for name, stats in report["callbacks"].items():
+        row = f"{name:<22}{stats['count']:>7}{stats['errors']:>8}"
+        row += "".join(
+            f"{stats[col]:>10.1f}"
+            for col in ["mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        )
+        print(row)
+
+    # the full memory series is only written with --json
+    if report["workers"]:
+        print()
+        header = f"{'pid':<10}{'seen (s)':>14}"
+        header += "".join(f"{col:>10}" for col in ["start", "peak", "end"])
+        print(header + "   (RSS, MB)")
+        for pid, stats in report["workers"].items():
+            seen = f"{stats['first_seen']:.0f}-{stats['last_seen']:.0f}"
+            row = f"{pid:<10}{seen:>14}"
+            row += "".join(
+                f"{stats[col]:>10.1f}" for col in ["start_mb", "peak_mb", "end_mb"]
+            )
+            print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay scripted dashboard sessions against the Dash callbacks."
+    )
+    parser.add_argument(
+        "--url",
+        help="base URL of a running server, e.g. a local gunicorn; "
+        "defaults to the in-process Flask test client",
+    )
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=4,
+        help="concurrent users, each sending the callbacks triggered by "
+        "one control change in parallel",
+    )
+    parser.add_argument(
+        "--sessions", type=int, default=3, help="sessions replayed per user"
+    )
+    parser.add_argument(
+        "--steps", type=int, default=5, help="scripted interactions per session"
+    )
+    parser.add_argument("--session", choices=sorted(SESSIONS), default="mixed")
+    parser.add_argument(
+        "--think-time",
+        type=float,
+        default=0.0,
+        help="maximum random pause in seconds between interactions",
+    )
+    parser.add_argument(
+        "--pid",
+        type=int,
+        action="append",
+        default=[],
+        help="worker process to sample memory of (repeatable); "
+        "defaults to this process when using the test client",
+    )
+    parser.add_argument(
+        "--master-pid",
+        type=int,
+        help="gunicorn master whose workers are sampled, re-listed on every "
+        "sample so respawned workers are included",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="memory sampling interval"
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=60.0,
+        help="seconds before a request to --url counts as an error",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    for option in ["users", "sessions", "steps", "interval", "timeout"]:
+        if getattr(args, option) <= 0:
+            parser.error(f"--{option} must be positive")
+    if args.think_time < 0:
+        parser.error("--think-time must not be negative")
+
+    if args.url:
+        get, post = make_http_client(args.url, args.timeout)
+        pids = args.pid
+    else:
+        get, post = make_test_client()
+        pids = args.pid or ([] if args.master_pid else [os.getpid()])
+
+    def list_pids():
+        if args.master_pid:
+            return pids + list_children(args.master_pid)
+        return pids
+
+    if not os.path.isdir("/proc"):
+        print(
+            "loadtest: warning: /proc not found, memory sampling is Linux-only "
+            "and will be skipped",
+            file=sys.stderr,
+        )
+    elif args.url and not pids and not args.master_pid:
+        print(
+            "loadtest: warning: no --pid or --master-pid given, "
+            "worker memory will not be sampled",
+            file=sys.stderr,
+        )
+
+    check_callbacks(get("/_dash-dependencies"))
+    controls, initial_state = read_controls(get("/_dash-layout"))
+
+    results = []
+    samples = []
+    stop = threading.Event()
+    started = time.perf_counter()
+    sampler = threading.Thread(
+        target=sample_memory,
+        args=(list_pids, args.interval, stop, samples, started),
+        daemon=True,
+    )
+    sampler.start()
+
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        futures = [
+            executor.submit(
+                run_user, user, args, post, controls, initial_state, results
+            )
+            for user in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+
+    duration = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+    for pid in list_pids():
+        samples.append((duration, pid, read_rss(pid)))
+
+    report = summarize(results, samples, duration)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
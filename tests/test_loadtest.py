@@ -0,0 +1,148 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import loadtest  # noqa: E402
+
+
+STATE = {
+    "genres": ["Action", "Drama"],
+    "years": [2000, 2016],
+    "budget": [0, 425000000],
+    "genres_drill": "Action",
+}
+
+
+def dependencies():
+    return [
+        {
+            "output": loadtest.output_id(outputs),
+            "inputs": [{"id": id, "property": "value"} for id in inputs],
+            "state": [],
+        }
+        for outputs, inputs in loadtest.CALLBACKS.values()
+    ]
+
+
+def test_build_payload_single_output():
+    payload = loadtest.build_payload("plot_heatmap", STATE, ["years"])
+    assert payload == {
+        "output": "heatmap.srcDoc",
+        "outputs": {"id": "heatmap", "property": "srcDoc"},
+        "inputs": [
+            {"id": "genres", "property": "value", "value": ["Action", "Drama"]},
+            {"id": "years", "property": "value", "value": [2000, 2016]},
+        ],
+        "changedPropIds": ["years.value"],
+        "state": [],
+    }
+
+
+def test_build_payload_multi_output():
+    payload = loadtest.build_payload("update_genres", STATE, ["genres"])
+    assert payload["output"] == "..genres_drill.options...genres_drill.value.."
+    assert payload["outputs"] == [
+        {"id": "genres_drill", "property": "options"},
+        {"id": "genres_drill", "property": "value"},
+    ]
+    assert payload["changedPropIds"] == ["genres.value"]
+
+
+def test_build_payload_ignores_changes_to_other_controls():
+    payload = loadtest.build_payload("generate_dash_table", STATE, ["genres"])
+    assert payload["changedPropIds"] == []
+
+
+def test_drop_repeats():
+    values = [[2000, 2016], [1990, 2016], [1990, 2016], [1980, 2016]]
+    assert loadtest.drop_repeats("years", values, STATE) == [
+        ("years", [1990, 2016]),
+        ("years", [1980, 2016]),
+    ]
+
+
+def test_read_controls():
+    layout = {
+        "props": {
+            "children": [
+                {
+                    "props": {
+                        "id": "years",
+                        "min": 1960,
+                        "max": 2015,
+                        "value": [2000, 2016],
+                    }
+                },
+                {
+                    "props": {
+                        "children": [
+                            "Genres",
+                            {
+                                "props": {
+                                    "id": "genres",
+                                    "options": [
+                                        {"label": "Action", "value": "Action"},
+                                        {"label": "Drama", "value": "Drama"},
+                                    ],
+                                    "value": ["Action"],
+                                }
+                            },
+                        ]
+                    }
+                },
+                {"props": {"id": "genres_drill"}},
+                {
+                    "props": {
+                        "id": "budget",
+                        "min": 1.0,
+                        "max": 425000000.0,
+                        "step": 5000000,
+                        "value": [0, 425000000],
+                    }
+                },
+            ]
+        }
+    }
+    controls, state = loadtest.read_controls(layout)
+    assert controls == {
+        "genres": ["Action", "Drama"],
+        "years": (1960, 2015),
+        "budget": (1.0, 425000000.0, 5000000),
+    }
+    assert state == {
+        "years": [2000, 2016],
+        "genres": ["Action"],
+        "genres_drill": None,
+        "budget": [0, 425000000],
+    }
+
+
+def test_read_controls_missing_control():
+    with pytest.raises(SystemExit):
+        loadtest.read_controls({"props": {"id": "years"}})
+
+
+def test_check_callbacks():
+    loadtest.check_callbacks(dependencies())
+
+
+def test_check_callbacks_unknown_callback_on_driven_control():
+    served = dependencies() + [
+        {
+            "output": "summary.children",
+            "inputs": [{"id": "budget", "property": "value"}],
+            "state": [],
+        }
+    ]
+    with pytest.raises(SystemExit):
+        loadtest.check_callbacks(served)
+
+
+def test_check_callbacks_state():
+    served = dependencies()
+    served[0]["state"] = [{"id": "modal", "property": "is_open"}]
+    with pytest.raises(SystemExit):
+        loadtest.check_callbacks(served)